@@ -9,6 +9,7 @@ from src.config import LLM
 from src.tools import AVAILABLE_TOOLS, TOOLS
 import re # 정규표현식 라이브러리 임포트
 import json
+from functools import lru_cache
 
 # --- 1. LangGraph: 멀티 에이전트 상태 정의 ---
 class AgentState(TypedDict):
@@ -277,6 +278,8 @@ def call_tools(state: AgentState):
     return {"messages": tool_messages, "current_weather": weather_update}
 
 # --- 6. 그래프 빌더 함수 (명시적 버전) ---
+# 노드는 상태를 갖지 않으므로 컴파일된 그래프 하나를 모든 세션이 공유합니다.
+@lru_cache(maxsize=1)
 def build_graph():
     workflow = StateGraph(AgentState)
 
@@ -5,6 +5,7 @@ from langchain_core.messages import HumanMessage, AIMessage
 from src.graph_flow import build_graph, AgentState 
 import re
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 # PDF 생성을 위한 라이브러리 임포트
 from fpdf import FPDF
@@ -17,6 +18,17 @@ if not st.session_state.get("preferences_collected", False):
         st.switch_page("pages/1_📝_여행_정보_입력.py")
     st.stop()
 
+# 상세 경로 계산 시 동시에 보낼 Google Directions 요청 수
+ROUTE_FETCH_WORKERS = 8
+
+def group_itinerary_by_day(itinerary):
+    """일정을 한 번만 훑어 {일차: [항목...]}으로 묶습니다.
+    같은 일차 안에서는 원본 순서를 유지하고, 일차는 오름차순으로 정렬됩니다. (day 기준 안정 정렬과 동일)"""
+    groups = {}
+    for item in itinerary:
+        groups.setdefault(item['day'], []).append(item)
+    return {day: groups[day] for day in sorted(groups)}
+
 # --- PDF 생성 함수 ---
 def create_itinerary_pdf(itinerary, destination, dates, weather, final_routes, total_days, route_details=None):
     """세션 상태 정보를 바탕으로 여행 계획 PDF를 생성합니다. (경로 정보 포함)"""
@@ -40,9 +52,8 @@ def create_itinerary_pdf(itinerary, destination, dates, weather, final_routes, t
     pdf.ln(20)
 
     # 2. 일차별 계획
-    # 원본 순서를 유지하면서 day와 인덱스로 정렬 (같은 day 내 순서 보장)
-    sorted_itinerary = sorted(enumerate(itinerary), key=lambda x: (x[1]['day'], x[0]))
-    sorted_itinerary = [item[1] for item in sorted_itinerary]  # 인덱스 제거
+    # 일차별로 한 번에 묶어 두고, 일차마다 전체 일정을 다시 훑지 않습니다.
+    places_by_day = group_itinerary_by_day(itinerary)
 
     # 첫 일차를 위한 새 페이지
     pdf.add_page()
@@ -55,7 +66,7 @@ def create_itinerary_pdf(itinerary, destination, dates, weather, final_routes, t
         pdf.set_font_size(18)
         pdf.cell(0, 15, f"Day {day_num}", ln=True)
 
-        places_today = [item for item in sorted_itinerary if item['day'] == day_num]
+        places_today = places_by_day.get(day_num, [])
 
         if not places_today:
             pdf.set_font_size(12)
@@ -193,6 +204,13 @@ if not st.session_state.messages:
     st.session_state.messages.append(HumanMessage(content=initial_prompt))
 
 # --- 5. 상태 업데이트 파싱 로직 ---
+# AI 메시지에서 상태를 읽어낼 때 쓰는 패턴 (매 턴 재사용하도록 미리 컴파일)
+_PLAN_ADD_RE = re.compile(r"'(.*?)'을/를 (\d+)일차 (관광지|식당|카페) 계획에 추가합니다")
+_STATE_UPDATE_RE = re.compile(r"\[STATE_UPDATE:\s*(.*?)\]", re.DOTALL)
+_STATE_ASSIGN_RE = re.compile(r'(\w+)\s*=\s*"(.*?)"')
+_CONTROL_TAG_RE = re.compile(r"\[(STATE_UPDATE|PLAN_ADD):.*?\]", re.DOTALL)
+INT_STATE_KEYS = frozenset(("total_days", "activity_level", "current_planning_day"))
+
 def update_state_from_message(message_text):
     # [안전장치] message_text가 문자열이 아닌 경우 처리
     if not isinstance(message_text, str):
@@ -210,7 +228,7 @@ def update_state_from_message(message_text):
     if not message_text:
         return
 
-    match_plan = re.search(r"'(.*?)'을/를 (\d+)일차 (관광지|식당|카페) 계획에 추가합니다", message_text)
+    match_plan = _PLAN_ADD_RE.search(message_text)
     if match_plan:
         place_name, day, place_type = match_plan.groups()
         new_item = {'day': int(day), 'type': place_type, 'name': place_name}
@@ -223,11 +241,11 @@ def update_state_from_message(message_text):
     if "[STATE_UPDATE: show_pdf_button=True]" in message_text:
         st.session_state.show_pdf_button = True
 
-    match_state = re.search(r"\[STATE_UPDATE:\s*(.*?)\]", message_text, re.DOTALL)
+    match_state = _STATE_UPDATE_RE.search(message_text)
     if match_state:
-        for key, value in re.findall(r'(\w+)\s*=\s*"(.*?)"', match_state.group(1)):
+        for key, value in _STATE_ASSIGN_RE.findall(match_state.group(1)):
             if hasattr(st.session_state, key):
-                if key in ["total_days", "activity_level", "current_planning_day"]:
+                if key in INT_STATE_KEYS:
                     try: value = int(value)
                     except ValueError: pass
                 setattr(st.session_state, key, value)
@@ -262,6 +280,13 @@ def run_ai_agent():
     if isinstance(final_message, AIMessage) and final_message.content:
         update_state_from_message(final_message.content)
 
+# 화면에 보여주지 않을 시스템용 블록 (최종 일정 JSON, 상태 업데이트/일정 추가 명령어)
+# 매 rerun마다 모든 메시지에 적용되므로 두 패턴을 하나로 묶어 한 번에 지웁니다.
+_HIDDEN_BLOCK_RE = re.compile(
+    r"\[FINAL_ITINERARY_JSON\].*?\[/FINAL_ITINERARY_JSON\]|\[(?:STATE_UPDATE|PLAN_ADD):.*?\]",
+    re.DOTALL
+)
+
 # 이전 대화 기록 UI 출력
 for msg in st.session_state.messages:
     content_to_display = msg.content
@@ -281,19 +306,7 @@ for msg in st.session_state.messages:
     if isinstance(msg, HumanMessage):
         st.chat_message("user").markdown(content_to_display)
     elif isinstance(msg, AIMessage) and content_to_display:
-        cleaned_text = re.sub(
-            r"\[FINAL_ITINERARY_JSON\].*?\[/FINAL_ITINERARY_JSON\]", 
-            "", 
-            content_to_display, 
-            flags=re.DOTALL
-        )
-        cleaned_text = re.sub(
-            r"\[(STATE_UPDATE|PLAN_ADD):.*?\]", 
-            "", 
-            cleaned_text, 
-            flags=re.DOTALL
-        )
-        display_text = cleaned_text.strip()
+        display_text = _HIDDEN_BLOCK_RE.sub("", content_to_display).strip()
         if display_text:
             st.chat_message("assistant").markdown(display_text)
 
@@ -313,36 +326,36 @@ if st.session_state.get("show_pdf_button", False):
         if st.button("🚀 상세 이동 경로 및 소요시간 계산하기"):
             with st.spinner("구글 지도에서 실시간 교통 정보를 가져오는 중입니다..."):
                 # [핵심 수정] 날짜별로 장소를 분류해야 인덱스(i)를 0부터 다시 셀 수 있음
-                places_by_day = {}
-                # 원본 순서를 유지하면서 day와 인덱스로 정렬 (같은 day 내 순서 보장)
-                sorted_all = sorted(enumerate(st.session_state.itinerary), key=lambda x: (x[1]['day'], x[0]))
-                sorted_all = [item[1] for item in sorted_all]
-                for item in sorted_all:
-                    d = item['day']
-                    if d not in places_by_day: places_by_day[d] = []
-                    places_by_day[d].append(item)
+                places_by_day = group_itinerary_by_day(st.session_state.itinerary)
                 
                 temp_routes = {}
                 
-                # 날짜별 루프
-                for day_num, places in places_by_day.items():
-                    for i in range(len(places) - 1):
-                        start = places[i]
-                        end = places[i+1]
-                        
-                        # 키 생성 규칙: Day{날짜}_{순번} (예: Day2_0)
-                        # 이렇게 해야 PDF 함수 및 아래 표시 로직과 번지수가 맞음
-                        route_key = f"Day{day_num}_{i}"
-                        
-                        # tools.py 함수 호출
-                        route_info = get_detailed_route(
-                            start['name'], 
-                            end['name'], 
-                            mode="transit"
-                        )
-                        
-                        if route_info:
-                            temp_routes[route_key] = route_info
+                # 구간끼리는 서로 의존하지 않으므로 모든 구간의 경로 조회를 동시에 요청합니다.
+                # (전체 대기 시간이 구간별 API 응답 시간의 합 -> 가장 느린 구간 하나로 줄어듦)
+                route_futures = {}
+                with ThreadPoolExecutor(max_workers=ROUTE_FETCH_WORKERS) as executor:
+                    # 날짜별 루프
+                    for day_num, places in places_by_day.items():
+                        for i in range(len(places) - 1):
+                            start = places[i]
+                            end = places[i+1]
+                            
+                            # 키 생성 규칙: Day{날짜}_{순번} (예: Day2_0)
+                            # 이렇게 해야 PDF 함수 및 아래 표시 로직과 번지수가 맞음
+                            route_key = f"Day{day_num}_{i}"
+                            
+                            # tools.py 함수 호출
+                            route_futures[route_key] = executor.submit(
+                                get_detailed_route,
+                                start['name'], 
+                                end['name'], 
+                                mode="transit"
+                            )
+                
+                for route_key, future in route_futures.items():
+                    route_info = future.result()
+                    if route_info:
+                        temp_routes[route_key] = route_info
                 
                 st.session_state.route_details = temp_routes
                 st.success("경로 분석 완료! 아래 PDF를 다운로드하면 이동 정보가 포함됩니다.")
@@ -350,16 +363,8 @@ if st.session_state.get("show_pdf_button", False):
 
         # [표시 로직] 계산된 경로가 있으면 화면에 보여주기
         if st.session_state.get("route_details"):
-            # 원본 순서를 유지하면서 day와 인덱스로 정렬 (같은 day 내 순서 보장)
-            sorted_all = sorted(enumerate(st.session_state.itinerary), key=lambda x: (x[1]['day'], x[0]))
-            sorted_all = [item[1] for item in sorted_all]
-
             # [핵심 수정] 표시할 때도 날짜별로 분류해서 키를 찾아야 함
-            places_by_day_display = {}
-            for item in sorted_all:
-                d = item['day']
-                if d not in places_by_day_display: places_by_day_display[d] = []
-                places_by_day_display[d].append(item)
+            places_by_day_display = group_itinerary_by_day(st.session_state.itinerary)
 
             for day_num, places in places_by_day_display.items():
                 # 날짜별 이동 경로 표시
@@ -385,7 +390,7 @@ if st.session_state.get("show_pdf_button", False):
     final_routes_text = ""
     for msg in reversed(st.session_state.messages):
         if isinstance(msg, AIMessage) and "최적 경로 제안" in msg.content:
-            final_routes_text = re.sub(r"\[(STATE_UPDATE|PLAN_ADD):.*?\]", "", msg.content, flags=re.DOTALL).strip()
+            final_routes_text = _CONTROL_TAG_RE.sub("", msg.content).strip()
             break 
     
     if not final_routes_text:
@@ -5,6 +5,7 @@ from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_community.vectorstores import FAISS
 from langchain_huggingface import HuggingFaceEmbeddings
 import googlemaps
+from functools import lru_cache
 
 # --- 1. 환경 변수 및 기본 설정 로드 ---
 load_dotenv()
@@ -24,13 +25,20 @@ else:
 
 # --- 2. RAG FAISS 인덱스 로드 함수 ---
 
-@st.cache_resource # 👈 [추가]
-def load_faiss_index():
-    """FAISS 인덱스를 로드합니다."""
-    embeddings = HuggingFaceEmbeddings(
+# st.cache_resource.clear()(DB 업데이트 후 호출)에도 모델이 다시 로드되지 않도록
+# 임베딩 모델은 st 캐시가 아닌 프로세스 단위 lru_cache로 한 번만 만듭니다.
+@lru_cache(maxsize=1)
+def get_embeddings():
+    """검색과 DB 업데이트가 함께 쓰는 bge-m3 임베딩 모델을 반환합니다."""
+    return HuggingFaceEmbeddings(
         model_name="upskyy/bge-m3-korean",
         model_kwargs={"device": "cpu"}
     )
+
+@st.cache_resource # 👈 [추가]
+def load_faiss_index():
+    """FAISS 인덱스를 로드합니다."""
+    embeddings = get_embeddings()
     load_db = FAISS.load_local(
         review_faiss, embeddings, allow_dangerous_deserialization=True
     )
@@ -10,6 +10,8 @@ from langchain_core.documents import Document
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 REVIEW_FAISS_DIR = "/Users/seoungmun/Documents/work/3-2/project/travle_agent4/review_faiss"  # 필요하면 경로 수정
+# True면 float32 Flat 인덱스를 8bit 스칼라 양자화(SQ8) 인덱스로 바꿔 저장 (메모리 약 1/4)
+QUANTIZE_SQ8 = False
 
 def load_metadata_list(path: str):
     with open(path, "rb") as f:
@@ -45,6 +47,20 @@ def ensure_documents(metadata_list):
             docs.append(Document(page_content=str(item), metadata={}))
 
     return docs
+def quantize_index_sq8(index):
+    """Flat 인덱스의 벡터를 그대로 꺼내 SQ8 인덱스로 다시 만듭니다.
+    전수 검색은 그대로 유지되어 검색 결과 순서가 거의 바뀌지 않습니다."""
+    if not isinstance(index, faiss.IndexFlat):
+        print(f"▶ Flat 인덱스가 아니므로 양자화를 건너뜁니다: {type(index).__name__}")
+        return index
+
+    vectors = index.reconstruct_n(0, index.ntotal)
+    sq_index = faiss.IndexScalarQuantizer(index.d, faiss.ScalarQuantizer.QT_8bit, index.metric_type)
+    sq_index.train(vectors)
+    sq_index.add(vectors)
+    print(f"▶ SQ8 양자화 완료: {index.ntotal}개 벡터 ({index.d}차원)")
+    return sq_index
+
 def main():
     # 1) faiss.index / metadata_list.pkl 경로
     faiss_index_path = os.path.join(REVIEW_FAISS_DIR, "faiss.index")
@@ -57,6 +73,8 @@ def main():
 
     print("▶ Loading FAISS index...")
     index = faiss.read_index(faiss_index_path)
+    if QUANTIZE_SQ8:
+        index = quantize_index_sq8(index)
 
     print("▶ Loading metadata_list.pkl...")
     metadata_list = load_metadata_list(metadata_path)
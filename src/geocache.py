@@ -0,0 +1,58 @@
+# src/geocache.py
+
+import os
+import sqlite3
+import threading
+import time
+
+# 도시 좌표(Geocoding) 결과를 SQLite 파일에 저장해 두는 영구 캐시.
+# 프로세스가 재시작되거나 여러 워커가 떠 있어도 같은 도시의 좌표를 다시 조회하지 않습니다.
+current_dir = os.path.dirname(os.path.abspath(__file__))
+GEOCACHE_PATH = os.path.join(os.path.dirname(current_dir), "geocache.db")
+GEOCACHE_TTL_SECONDS = 30 * 24 * 60 * 60  # 30일
+
+_conn = None
+_lock = threading.Lock()
+
+
+def _get_conn():
+    """SQLite 연결을 한 번만 열어 재사용합니다. (호출 측에서 _lock을 잡은 상태여야 함)"""
+    global _conn
+    if _conn is None:
+        conn = sqlite3.connect(GEOCACHE_PATH, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")  # 여러 프로세스가 동시에 읽고 쓸 수 있도록
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS geo (key TEXT PRIMARY KEY, lat REAL, lng REAL, ts INTEGER)"
+        )
+        _conn = conn
+    return _conn
+
+
+def get_cached_coords(key: str):
+    """저장된 (위도, 경도)를 반환합니다. 없거나 TTL이 지났으면 None."""
+    try:
+        with _lock:
+            row = _get_conn().execute(
+                "SELECT lat, lng, ts FROM geo WHERE key = ?", (key,)
+            ).fetchone()
+    except sqlite3.Error as e:
+        print(f"DEBUG: geocache 조회 실패: {e}")
+        return None
+
+    if row is None or time.time() - row[2] > GEOCACHE_TTL_SECONDS:
+        return None
+    return row[0], row[1]
+
+
+def store_coords(key: str, lat: float, lng: float) -> None:
+    """(위도, 경도)를 저장합니다. 캐시 저장 실패는 조회 결과에 영향을 주지 않습니다."""
+    try:
+        with _lock:
+            conn = _get_conn()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO geo (key, lat, lng, ts) VALUES (?, ?, ?, ?)",
+                    (key, lat, lng, int(time.time())),
+                )
+    except sqlite3.Error as e:
+        print(f"DEBUG: geocache 저장 실패: {e}")
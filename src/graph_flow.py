@@ -1,32 +1,43 @@
 # src/graph_flow.py
 
-from typing import TypedDict, Annotated, List, Literal, Dict, Any
+from typing import TypedDict, Annotated, List, Literal, Any
 from langgraph.graph import StateGraph, END
 from langgraph.graph.message import add_messages
-from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
+from langchain_core.messages import HumanMessage, AIMessage, ToolMessage, trim_messages
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from src.config import LLM
 from src.tools import AVAILABLE_TOOLS, TOOLS
 import re # 정규표현식 라이브러리 임포트
 import json
+import orjson
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, wait
+from functools import lru_cache
+
+def _part_to_str(part: Any) -> str:
+    """멀티파트 content의 한 조각을 문자열로 변환."""
+    # 대부분의 조각은 plain dict이므로 isinstance 대신 type 동일성 검사로 분기합니다.
+    if type(part) is dict and part.get("type") == "text" and "text" in part:
+        return str(part["text"])
+    return str(part)
+
 
 def normalize_content_to_str(content: Any) -> str:
     """LLM 응답 content를 항상 str로 변환."""
     if content is None:
         return ""
 
+    # 이미 str이면 그대로 (가장 흔한 경우)
+    if type(content) is str:
+        return content
+
     # 멀티파트 메시지: [{"type": "text", "text": "..."}, ...] 형태
     if isinstance(content, list):
-        parts = []
-        for part in content:
-            if isinstance(part, dict):
-                if part.get("type") == "text" and "text" in part:
-                    parts.append(str(part["text"]))
-                else:
-                    parts.append(str(part))
-            else:
-                parts.append(str(part))
-        return "\n".join(parts)
+        return "\n".join([_part_to_str(part) for part in content])
 
     # dict (structured output, JSON 등)
     if isinstance(content, dict):
@@ -40,10 +51,21 @@ def normalize_content_to_str(content: Any) -> str:
 
 
 # --- 1. LangGraph: 멀티 에이전트 상태 정의 ---
+class ItineraryItem(TypedDict, total=False):
+    """일정 항목 스키마. 상태/세션/프롬프트 사이를 plain dict 그대로 오가므로 TypedDict로만 정의합니다."""
+    day: int
+    type: str # '관광지', '식당', '카페'
+    name: str
+    description: str
+    # plan_itinerary_timeline 도구가 채워 넣는 시간 정보
+    estimated_start_time: str
+    estimated_end_time: str
+    estimated_duration_minutes: int
+
 class AgentState(TypedDict):
     messages: Annotated[list, add_messages]
     current_weather: str
-    itinerary: List[Dict]
+    itinerary: List[ItineraryItem]
     destination: str
     dates: str
     preference: str
@@ -53,75 +75,152 @@ class AgentState(TypedDict):
     show_pdf_button: bool # [추가] PDF 다운로드 버튼 표시 여부를 제어하는 상태
     next_node: Literal[
         "InfoCollectorAgent", "WeatherAgent", "AttractionAgent", "RestaurantAgent",
-        "DayTransitionAgent", "ConfirmationAgent", "PDFCreationAgent", "end_node" # [추가] 새 에이전트
-    ]
+        "DayTransitionAgent", "ConfirmationAgent", "PDFCreationAgent", "end_node", # [추가] 새 에이전트
+        "call_tools"
+    ] # 전문가 노드가 응답 직후 결정한 다음 경로 (expert_router가 그대로 사용)
 
 # --- 2. 전문 에이전트(노드) 정의 ---
-def create_specialist_agent(system_prompt: str):
-    prompt = ChatPromptTemplate.from_messages([("system", system_prompt), ("placeholder", "{messages}")])
-    llm_with_tools = LLM.bind_tools(TOOLS)
-    chain = prompt | llm_with_tools
-    def agent_node(state: AgentState):
-        state_summary = f"""
+# LLM에 전달할 최대 대화 메시지 수 (오래된 메시지는 잘라냄)
+MAX_HISTORY_MESSAGES = 40
+
+def trim_history(messages: list) -> list:
+    """최근 MAX_HISTORY_MESSAGES개의 메시지만 남깁니다.
+    사람 메시지에서 시작하도록 잘라 도구 호출/결과 쌍이 끊기지 않게 합니다."""
+    trimmed = trim_messages(
+        messages,
+        max_tokens=MAX_HISTORY_MESSAGES,
+        token_counter=len,  # 메시지 개수 기준
+        strategy="last",
+        start_on="human",
+        allow_partial=False,
+    )
+    return trimmed or messages
+
+STATE_SUMMARY_TEMPLATE = """
 --- 현재 계획 상태 ---
-날씨: {state.get('current_weather', '아직 모름')}
-전체 확정 일정: {state.get('itinerary', [])}
-여행지: {state.get('destination', '아직 모름')}
-날짜: {state.get('dates', '아직 모름')}
-취향: {state.get('preference', '아직 모름')}
-총 여행일: {state.get('total_days', 1)}일
-하루 목표 활동량: {state.get('activity_level', 3)}곳
-현재 계획 중인 날짜: {state.get('current_planning_day', 1)}일차
+날씨: {current_weather}
+전체 확정 일정: {itinerary}
+여행지: {destination}
+날짜: {dates}
+취향: {preference}
+총 여행일: {total_days}일
+하루 목표 활동량: {activity_level}곳
+현재 계획 중인 날짜: {current_planning_day}일차
 ---
 """
-        current_messages = [HumanMessage(content=state_summary)] + state['messages']
+
+def build_state_summary(state: AgentState) -> str:
+    """에이전트에 함께 전달할 현재 계획 상태 요약 문자열을 만듭니다."""
+    return STATE_SUMMARY_TEMPLATE.format(
+        current_weather=state.get('current_weather', '아직 모름'),
+        itinerary=state.get('itinerary', []),
+        destination=state.get('destination', '아직 모름'),
+        dates=state.get('dates', '아직 모름'),
+        preference=state.get('preference', '아직 모름'),
+        total_days=state.get('total_days', 1),
+        activity_level=state.get('activity_level', 3),
+        current_planning_day=state.get('current_planning_day', 1),
+    )
+
+# 에이전트 응답에서 일정 정보를 추출하는 정규식 (응답마다 다시 컴파일하지 않도록 미리 컴파일)
+_FINAL_ITINERARY_RE = re.compile(r"\[FINAL_ITINERARY_JSON\](.*)\[/FINAL_ITINERARY_JSON\]", re.DOTALL)
+_PLAN_ADD_RE = re.compile(r"'(.*?)'을/를 (\d+)일차 (관광지|식당|카페) 계획에 추가합니다")
+
+# 도구 스키마 바인딩은 모든 전문 에이전트가 공유하므로 임포트 시 한 번만 수행합니다.
+LLM_WITH_TOOLS = LLM.bind_tools(TOOLS)
+
+def create_specialist_agent(system_prompt: str, speculative_tool: str = None):
+    """speculative_tool: 이 에이전트가 거의 항상 호출하는 도구. LLM 응답을 기다리는 동안
+    상태에서 인자를 채워 미리 실행해 두고, call_tools에서 같은 호출이 오면 그 결과를 사용합니다."""
+    prompt = ChatPromptTemplate.from_messages([("system", system_prompt), ("placeholder", "{messages}")])
+    chain = prompt | LLM_WITH_TOOLS
+    def agent_node(state: AgentState):
+        speculated_key = speculate_tool_call(speculative_tool, state) if speculative_tool else None
+        state_summary = build_state_summary(state)
+        current_messages = [HumanMessage(content=state_summary)] + trim_history(state['messages'])
         response = chain.invoke({"messages": current_messages})
-        
-        itinerary = state.get('itinerary', []).copy()
+
+        # LLM이 선행 실행과 같은 호출을 하지 않았으면 (다른 인자, 또는 도구 미사용) 선행 실행을 취소합니다.
+        if speculated_key is not None:
+            real_call_keys = {
+                _tool_call_key(call["name"], _with_context_args(call["name"], call["args"], state))
+                for call in (getattr(response, "tool_calls", None) or [])
+            }
+            if speculated_key not in real_call_keys:
+                _discard_speculation(speculated_key)
+
+        # 기존 일정은 그대로 공유하고, 이번 턴에 추가된 항목만 따로 모았다가
+        # 노드 종료 시 한 번에 새 리스트로 만듭니다. (일정이 바뀌지 않으면 복사하지 않음)
+        itinerary = state.get('itinerary', [])
+        itinerary_replaced = False
+        appended_items = []
 
         raw_content = getattr(response, "content", "")
         content = normalize_content_to_str(raw_content)
 
         # SupervisorAgent가 생성한 최종 itinerary JSON을 파싱하여 상태를 업데이트하는 로직
-        final_itinerary_match = re.search(r"\[FINAL_ITINERARY_JSON\](.*)\[/FINAL_ITINERARY_JSON\]", content, re.DOTALL)
+        final_itinerary_match = _FINAL_ITINERARY_RE.search(content)
         if final_itinerary_match:
             try:
                 # 정규표현식으로 추출한 JSON 문자열에서 불필요한 공백/줄바꿈 제거
                 itinerary_json_str = final_itinerary_match.group(1).strip()
                 # JSON 문자열을 파이썬 리스트 객체로 변환
-                parsed_itinerary = json.loads(itinerary_json_str)
+                parsed_itinerary = orjson.loads(itinerary_json_str)
                 
                 # 디버깅을 위해 터미널에 출력
                 print(f"DEBUG: SupervisorAgent가 최종 정리한 itinerary:\n{parsed_itinerary}")
                 
                 # 현재 itinerary 상태를 새로 파싱한 데이터로 완전히 교체
                 itinerary = parsed_itinerary
-            except json.JSONDecodeError as e:
+                itinerary_replaced = True
+            except orjson.JSONDecodeError as e:
                 # JSON 변환 중 오류가 발생하면 터미널에 에러 메시지 출력
                 print(f"ERROR: 최종 itinerary JSON 파싱에 실패했습니다. 오류: {e}")
                 print(f"파싱 시도 원본 문자열: {itinerary_json_str}")
 
         # 기존의 간단한 일정 추가 로직 (대화 중에 장소를 하나씩 추가할 때 사용)
-        match = re.search(r"'(.*?)'을/를 (\d+)일차 (관광지|식당|카페) 계획에 추가합니다", content)
+        match = _PLAN_ADD_RE.search(content)
         if match:
             name, day, type = match.groups()
             # [수정 3] 간단한 추가 시에는 'description' 키가 없으므로 기본값을 넣어줍니다.
-            new_item = {'day': int(day), 'type': type, 'name': name, 'description': ''}
-            if new_item not in itinerary:
-                itinerary.append(new_item)
+            new_item: ItineraryItem = {'day': int(day), 'type': type, 'name': name, 'description': ''}
+            if new_item not in itinerary and new_item not in appended_items:
+                appended_items.append(new_item)
 
         # PDF 다운로드 버튼 표시 여부를 제어하는 로직
         show_pdf_button = state.get('show_pdf_button', False)
         if "[STATE_UPDATE: show_pdf_button=True]" in content:
             show_pdf_button = True
 
-        return {"messages": [response], "itinerary": itinerary, "show_pdf_button": show_pdf_button}
+        # 다음 경로를 여기서 한 번 결정해 두고 expert_router는 상태만 읽습니다.
+        # 1순위: Supervisor가 PDF용 JSON을 생성했는지, 2순위: 도구 호출이 있는지, 그 외에는 종료
+        if "[FINAL_ITINERARY_JSON]" in content:
+            next_node = "PDFCreationAgent"
+        elif getattr(response, "tool_calls", None):
+            next_node = "call_tools"
+        else:
+            next_node = "end_node"
+
+        updates = {"messages": [response], "show_pdf_button": show_pdf_button, "next_node": next_node}
+        # 일정이 바뀌지 않은 턴에는 itinerary 키를 생략해 기존 상태를 그대로 유지합니다.
+        if itinerary_replaced or appended_items:
+            updates["itinerary"] = itinerary + appended_items
+        return updates
     return agent_node
 
 # --- 3. Supervisor (라우터) 정의 ---
+# 라우팅 키워드 그룹별로 정규식을 미리 컴파일해 메시지를 그룹당 한 번만 스캔합니다.
+_PDF_REQUEST_RE = re.compile("pdf|파일|정리|다운로드")
+_ROUTE_REQUEST_RE = re.compile("최적화|순서|경로")
+_RESTAURANT_REQUEST_RE = re.compile("식당|맛집|카페|먹고")
+_ATTRACTION_REQUEST_RE = re.compile("관광|장소|다른 곳")
+
+# 계획을 시작하기 전에 반드시 채워져 있어야 하는 상태 키
+REQUIRED_INFO_KEYS = ("destination", "dates", "total_days", "activity_level")
+
 def supervisor_router(state: AgentState):
     print("--- (Supervisor) 다음 작업 결정 ---")
-    if not all(state.get(key) for key in ['destination', 'dates', 'total_days', 'activity_level']): return "InfoCollectorAgent"
+    if not all(map(state.get, REQUIRED_INFO_KEYS)): return "InfoCollectorAgent"
     if not state.get('current_weather'): return "WeatherAgent"
     if not state.get('preference'): return "SupervisorAgent"
 
@@ -137,23 +236,24 @@ def supervisor_router(state: AgentState):
     # 2. 사용자가 처음 PDF를 요청하면, '정리'를 위해 슈퍼바이저에게 먼저 보냅니다.
     if isinstance(last_message, HumanMessage):
         content = last_message.content.lower()
-        if any(k in content for k in ["pdf", "파일", "정리", "다운로드"]):
+        if _PDF_REQUEST_RE.search(content):
             print("Supervisor -> SupervisorAgent (PDF 생성을 위한 데이터 정리 요청)")
             return "SupervisorAgent" # <--- 목적지를 PDFCreationAgent에서 SupervisorAgent로 변경!
             
-        if any(k in content for k in ["최적화", "순서", "경로"]): return "SupervisorAgent"
-        if any(k in content for k in ["식당", "맛집", "카페", "먹고"]): return "RestaurantAgent"
-        if any(k in content for k in ["관광", "장소", "다른 곳"]): return "AttractionAgent"
+        if _ROUTE_REQUEST_RE.search(content): return "SupervisorAgent"
+        if _RESTAURANT_REQUEST_RE.search(content): return "RestaurantAgent"
+        if _ATTRACTION_REQUEST_RE.search(content): return "AttractionAgent"
 
     total_days, current_day, activity_level = state.get("total_days"), state.get("current_planning_day"), state.get("activity_level")
-    places_for_current_day = [p for p in state.get("itinerary", []) if p.get('day') == current_day]
+    # 현재 날짜의 장소 수만 필요하므로 리스트를 만들지 않고 한 번에 셉니다.
+    current_day_count = sum(1 for p in state.get("itinerary", []) if p.get('day') == current_day)
 
-    if len(places_for_current_day) >= activity_level:
+    if current_day_count >= activity_level:
         if current_day < total_days: return "DayTransitionAgent"
         else: return "ConfirmationAgent"
             
     if isinstance(state['messages'][-1], AIMessage) and "계획에 추가합니다" in state['messages'][-1].content:
-        print(f"Supervisor -> AttractionAgent ({current_day}일차 연속 추천, {len(places_for_current_day)}/{activity_level}곳)")
+        print(f"Supervisor -> AttractionAgent ({current_day}일차 연속 추천, {current_day_count}/{activity_level}곳)")
         return "AttractionAgent"
     
     if isinstance(last_message, ToolMessage):
@@ -163,19 +263,15 @@ def supervisor_router(state: AgentState):
 
 # --- 4. 에이전트(노드) 생성 (프롬프트 전체 복원) ---
 
-# [추가] PDF 생성을 전담하는 새 에이전트 프롬프트
-pdf_creation_prompt = """당신은 'PDF 문서 생성 전문가'입니다.
-사용자가 "pdf로 정리해줘", "파일로 만들어줘" 등 여행 계획을 파일로 만들고 싶어하는 요청을 받았습니다.
+# [추가] PDF 생성을 전담하는 노드
+# 응답 문장과 버튼 표시가 항상 고정이므로 LLM을 부르지 않고 바로 상태를 갱신합니다.
+PDF_READY_MESSAGE = "네, 전체 여행 계획을 PDF 파일로 정리해 드릴게요. 잠시 후 표시되는 버튼을 눌러 다운로드하세요."
 
-당신의 유일한 임무는 사용자에게 PDF 다운로드 버튼이 곧 표시될 것임을 알리는 것입니다.
-아래와 같이 정확한 문장으로 응답하고, **응답 마지막에 상태 업데이트를 위한 명령어를 반드시 포함**해야 합니다.
+def pdf_creation_agent_node(state: AgentState):
+    print("--- PDFCreationAgent: PDF 다운로드 버튼 활성화 ---")
+    return {"messages": [AIMessage(content=PDF_READY_MESSAGE)], "show_pdf_button": True}
 
-"네, 전체 여행 계획을 PDF 파일로 정리해 드릴게요. 잠시 후 표시되는 버튼을 눌러 다운로드하세요."
-
-명령어:
-[STATE_UPDATE: show_pdf_button=True]
-"""
-PDFCreationAgent = create_specialist_agent(pdf_creation_prompt)
+PDFCreationAgent = pdf_creation_agent_node
 
 supervisor_prompt = """당신은 AI 여행 플래너 팀의 '슈퍼바이저'입니다.
 당신은 전문가 팀(날씨, 관광, 식당)을 관리하고, 사용자와의 상호작용을 총괄하며, 계획의 전체적인 흐름을 책임집니다.
@@ -213,16 +309,7 @@ supervisor_prompt = """당신은 AI 여행 플래너 팀의 '슈퍼바이저'입
 """
 SupervisorAgent = create_specialist_agent(supervisor_prompt)
 
-def day_transition_agent_node(state: AgentState):
-    """한 날의 계획이 끝나고 다음 날 계획을 시작할 것을 알리는 에이전트입니다."""
-    
-    # 상태에서 필요한 변수들을 직접 가져옵니다.
-    current_day = state.get("current_planning_day", 1)
-    activity_level = state.get("activity_level", 3)
-    next_day = current_day + 1
-
-    # f-string을 사용하여 프롬프트 텍스트를 완성합니다.
-    prompt_text = f"""당신은 '플랜 전환 안내자'입니다.
+day_transition_prompt = """당신은 '플랜 전환 안내자'입니다.
 당신의 유일한 임무는 한 날의 계획이 끝나고 다음 날 계획을 시작할 것을 알리는 것입니다.
 현재 상태를 참고하여, 아래와 같이 정확한 문장으로 응답하고 사용자의 동의를 구하세요.
 
@@ -232,12 +319,22 @@ def day_transition_agent_node(state: AgentState):
 [STATE_UPDATE: increment_day=True]
 """
 
+@lru_cache(maxsize=16)
+def _day_transition_chain(current_day: int, activity_level: int):
+    """(날짜, 활동량) 조합별로 프롬프트를 한 번만 렌더링한 체인을 만들어 재사용합니다."""
+    prompt_text = day_transition_prompt.format(
+        current_day=current_day, activity_level=activity_level, next_day=current_day + 1
+    )
     # 이 에이전트는 도구를 사용하지 않으므로 LLM만 호출합니다.
     prompt = ChatPromptTemplate.from_messages([
         ("system", prompt_text),
         ("placeholder", "{messages}")
     ])
-    chain = prompt | LLM
+    return prompt | LLM
+
+def day_transition_agent_node(state: AgentState):
+    """한 날의 계획이 끝나고 다음 날 계획을 시작할 것을 알리는 에이전트입니다."""
+    chain = _day_transition_chain(state.get("current_planning_day", 1), state.get("activity_level", 3))
     
     # state_summary 없이 마지막 메시지만 전달하여 단순 응답을 유도합니다.
     response = chain.invoke({"messages": state['messages'][-1:]})
@@ -281,119 +378,272 @@ RestaurantAgent = create_specialist_agent(restaurant_prompt)
 
 weather_prompt = """당신은 '날씨 분석가'입니다.
 `get_weather_forecast` 도구를 호출하여 `destination`과 `dates`의 날씨를 확인하세요."""
-WeatherAgent = create_specialist_agent(weather_prompt)
+WeatherAgent = create_specialist_agent(weather_prompt, speculative_tool="get_weather_forecast")
 
 # --- 5. 도구 실행 노드 ---
+# 도구별로 state에서 주입할 컨텍스트 인자 (LLM이 인자를 생략한 경우에만 채웁니다)
+TOOL_CONTEXT_ARGS = {
+    "search_attractions_and_reviews": ("destination",),
+    "get_weather_forecast": ("destination", "dates"),
+}
+# 도구 결과로 갱신할 state 키
+TOOL_STATE_UPDATES = {
+    "get_weather_forecast": "current_weather",
+}
+
+# 도구 병렬 실행 설정: call_tools 한 번(한 세션의 한 턴) 안에서의 동시 실행 수 상한과 도구별 제한 시간(초)
+# 실행기는 호출마다 새로 만들므로, 제한 시간을 넘겨 버려진 도구가 다른 세션의 도구 실행을 막지 않습니다.
+MAX_TOOL_CONCURRENCY = 4
+DEFAULT_TOOL_TIMEOUT = 60
+TOOL_TIMEOUTS = {
+    "search_attractions_and_reviews": 120,
+    "get_weather_forecast": 20,
+    "optimize_and_get_routes": 30,
+    "plan_itinerary_timeline": 90,
+}
+
+def _tool_executor(max_workers: int) -> ContextThreadPoolExecutor:
+    """도구 실행용 스레드 풀을 만듭니다. 호출한 스레드의 Streamlit 실행 컨텍스트를 워커 스레드에 붙여
+    도구 안의 st.cache_resource(load_faiss_index 등) 호출이 컨텍스트 경고 없이 동작하도록 합니다."""
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ContextThreadPoolExecutor(
+        max_workers=max_workers,
+        initializer=lambda: add_script_run_ctx(threading.current_thread(), ctx),
+    )
+
+def _invoke_tool(tool_name: str, tool_args: dict):
+    """도구 하나를 실행하고 (성공 여부, 결과)를 반환합니다."""
+    tool_to_call = AVAILABLE_TOOLS.get(tool_name)
+    if not tool_to_call:
+        return False, f"오류: '{tool_name}'라는 이름의 도구를 찾을 수 없습니다."
+    try:
+        return True, tool_to_call.invoke(tool_args)
+    except Exception as e:
+        return False, f"도구 '{tool_name}' 실행 중 오류 발생: {e}"
+
+def _tool_call_key(tool_name: str, tool_args: dict):
+    """같은 도구/인자 호출을 식별하는 키 (중복 호출 재사용 및 선행 실행 매칭에 사용)"""
+    return (tool_name, orjson.dumps(tool_args, option=orjson.OPT_SORT_KEYS, default=str))
+
+# 선행(speculative) 실행: 에이전트 LLM이 도구 호출을 생성하는 동안 예상되는 도구를 미리 실행합니다.
+# 호출 키 -> (future, 마감 시각, 시작 시각). 여러 세션 스레드가 공유하므로 락으로 보호합니다.
+SPECULATION_TTL = 60
+_SPECULATIVE_CALLS = {}
+_SPECULATION_LOCK = threading.Lock()
+
+def _with_context_args(tool_name: str, tool_args: dict, state: AgentState) -> dict:
+    """LLM이 생략한 컨텍스트 인자(destination, dates)를 state에서 채운 인자 사본을 반환합니다."""
+    tool_args = tool_args.copy() # 인자를 복사하여 수정
+    for key in TOOL_CONTEXT_ARGS.get(tool_name, ()):
+        if key not in tool_args:
+            tool_args[key] = state.get(key)
+    return tool_args
+
+def speculate_tool_call(tool_name: str, state: AgentState):
+    """상태에 있는 컨텍스트 인자만으로 도구를 미리 실행해 둡니다.
+    이번에 새로 시작한 선행 실행의 호출 키를 반환하고, 시작하지 않았으면 None을 반환합니다.
+    (인자가 모자라거나, 결과가 이미 캐시되어 있거나, 같은 호출이 이미 실행 중인 경우)"""
+    tool_args = {key: state.get(key) for key in TOOL_CONTEXT_ARGS.get(tool_name, ())}
+    if not tool_args or not all(tool_args.values()):
+        return None
+    call_key = _tool_call_key(tool_name, tool_args)
+    if _get_cached_tool_result(call_key) is not None:
+        return None  # call_tools가 캐시된 결과를 바로 사용하므로 미리 실행할 필요가 없음
+    now = time.monotonic()
+    with _SPECULATION_LOCK:
+        # 사용되지 않고 오래된 선행 실행은 버립니다.
+        for key in [k for k, (_, _, started) in _SPECULATIVE_CALLS.items() if now - started > SPECULATION_TTL]:
+            _SPECULATIVE_CALLS.pop(key)[0].cancel()
+        if call_key in _SPECULATIVE_CALLS:
+            return None
+        # 선행 실행은 전용 스레드 하나에서 돌리고 바로 shutdown(wait=False) 합니다. (작업이 끝나면 스레드도 종료)
+        executor = _tool_executor(max_workers=1)
+        future = executor.submit(_invoke_tool, tool_name, tool_args)
+        executor.shutdown(wait=False)
+        deadline = now + TOOL_TIMEOUTS.get(tool_name, DEFAULT_TOOL_TIMEOUT)
+        _SPECULATIVE_CALLS[call_key] = (future, deadline, now)
+    print(f"DEBUG: 도구 선행 실행 시작 ({tool_name})")
+    return call_key
+
+def _discard_speculation(call_key):
+    """LLM이 사용하지 않은 선행 실행을 목록에서 빼고 취소합니다. (이미 실행 중이면 전용 스레드에서 끝나고 버려짐)"""
+    with _SPECULATION_LOCK:
+        entry = _SPECULATIVE_CALLS.pop(call_key, None)
+    if entry is not None:
+        entry[0].cancel()
+        print(f"DEBUG: 사용되지 않은 도구 선행 실행 취소 ({call_key[0]})")
+
+def _take_speculation(call_key):
+    """일치하는 선행 실행이 있으면 (future, 마감 시각)을 꺼내 반환합니다."""
+    with _SPECULATION_LOCK:
+        entry = _SPECULATIVE_CALLS.pop(call_key, None)
+    if entry is None:
+        return None
+    future, deadline, _ = entry
+    return future, deadline
+
+# 읽기 전용 도구의 결과 캐시: 같은 인자의 재호출(재시도, 다른 세션의 같은 목적지 등)은
+# FAISS 검색 + LLM 호출을 다시 하지 않고 이전 결과를 돌려줍니다. 도구명 -> 유효 시간(초)
+CACHEABLE_TOOL_TTLS = {
+    "search_attractions_and_reviews": 1800,
+    "get_weather_forecast": 1800,
+}
+TOOL_RESULT_CACHE_SIZE = 128
+_TOOL_RESULT_CACHE = OrderedDict()  # 호출 키 -> (만료 시각, 결과)
+_TOOL_RESULT_CACHE_LOCK = threading.Lock()
+
+def _get_cached_tool_result(call_key):
+    with _TOOL_RESULT_CACHE_LOCK:
+        entry = _TOOL_RESULT_CACHE.get(call_key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del _TOOL_RESULT_CACHE[call_key]
+            return None
+        _TOOL_RESULT_CACHE.move_to_end(call_key)
+        return entry[1]
+
+def _store_tool_result(call_key, output):
+    ttl = CACHEABLE_TOOL_TTLS.get(call_key[0])
+    # 도구는 실패 시에도 "오류: ..." 문자열을 반환하므로 이런 결과는 저장하지 않습니다.
+    if not ttl or str(output).startswith("오류"):
+        return
+    with _TOOL_RESULT_CACHE_LOCK:
+        _TOOL_RESULT_CACHE[call_key] = (time.monotonic() + ttl, output)
+        _TOOL_RESULT_CACHE.move_to_end(call_key)
+        while len(_TOOL_RESULT_CACHE) > TOOL_RESULT_CACHE_SIZE:
+            _TOOL_RESULT_CACHE.popitem(last=False)
+
 def call_tools(state: AgentState):
     """
     Agent가 요청한 도구 호출을 수행하고, 필요한 context(destination, dates)를 
     state에서 가져와 도구에 주입합니다. (지역 필터링, 날씨 정보 누락 해결)
+    여러 도구 호출은 스레드 풀에서 동시에 실행되며, 제한 시간을 넘기면 오류 메시지로 대체됩니다.
     """
     last_message = state['messages'][-1]
     if not isinstance(last_message, AIMessage) or not last_message.tool_calls:
         return {}
         
     tool_messages = []
-    weather_update = state.get('current_weather')
-    
-    # [핵심 수정] 도구에 전달할 컨텍스트(destination, dates)를 상태에서 가져옴
-    current_destination = state.get('destination')
-    current_dates = state.get('dates') 
+    state_updates = {"current_weather": state.get('current_weather')}
     
+    call_futures = []  # tool_call 순서대로 대응하는 future (결과 슬롯)
+    submitted = {}     # (도구명, 정규화된 인자) -> future : 같은 턴의 중복 호출은 한 번만 실행
+    future_info = {}   # future -> (도구명, 마감 시각)
+    results = {}       # future(또는 캐시 적중 시 호출 키) -> 결과
+    executor = None    # 이번 호출 전용 실행기 (실제로 실행할 도구가 있을 때만 생성)
     for tool_call in last_message.tool_calls:
         tool_name = tool_call["name"]
-        tool_args = tool_call["args"].copy() # 인자를 복사하여 수정
-        tool_to_call = AVAILABLE_TOOLS.get(tool_name)
-        output = ""
-        
-        # --- [수정] 도구별 인자 주입 로직 ---
-        # 1. search_attractions_and_reviews 도구에 destination 주입
-        if tool_name == "search_attractions_and_reviews" and 'destination' not in tool_args:
-            tool_args['destination'] = current_destination
-        
-        # 2. get_weather_forecast 도구에 destination과 dates 주입
-        if tool_name == "get_weather_forecast":
-            if 'destination' not in tool_args: tool_args['destination'] = current_destination
-            if 'dates' not in tool_args: tool_args['dates'] = current_dates
-        # ------------------------------------
+        # [핵심 수정] 도구에 전달할 컨텍스트(destination, dates)를 상태에서 가져와 주입
+        tool_args = _with_context_args(tool_name, tool_call["args"], state)
         
-        if not tool_to_call:
-            output = f"오류: '{tool_name}'라는 이름의 도구를 찾을 수 없습니다."
+        call_key = _tool_call_key(tool_name, tool_args)
+        if call_key in submitted:
+            print(f"DEBUG: 중복 도구 호출 재사용 ({tool_name})")
+            future = submitted[call_key]
+        elif tool_name in CACHEABLE_TOOL_TTLS and (cached := _get_cached_tool_result(call_key)) is not None:
+            print(f"DEBUG: 캐시된 도구 결과 사용 ({tool_name})")
+            future = call_key
+            submitted[call_key] = future
+            results[future] = cached
+            state_key = TOOL_STATE_UPDATES.get(tool_name)
+            if state_key:
+                state_updates[state_key] = cached
         else:
-            try:
-                # 수정된 tool_args를 사용하여 도구 실행
-                output = tool_to_call.invoke(tool_args)
-                if tool_name == "get_weather_forecast":
-                    weather_update = output
-            except Exception as e:
-                output = f"도구 '{tool_name}' 실행 중 오류 발생: {e}"
-        tool_messages.append(ToolMessage(content=str(output), tool_call_id=tool_call["id"]))
+            speculation = _take_speculation(call_key)
+            if speculation:
+                print(f"DEBUG: 선행 실행 결과 사용 ({tool_name})")
+                future, deadline = speculation
+            else:
+                if executor is None:
+                    executor = _tool_executor(max_workers=MAX_TOOL_CONCURRENCY)
+                future = executor.submit(_invoke_tool, tool_name, tool_args)
+                deadline = time.monotonic() + TOOL_TIMEOUTS.get(tool_name, DEFAULT_TOOL_TIMEOUT)
+            submitted[call_key] = future
+            future_info[future] = (tool_name, deadline, call_key)
+        call_futures.append(future)
+
+    # 가장 느린 도구를 기다리지 않고, 끝나는 순서대로 결과를 반영합니다.
+    remaining = set(future_info)
+    while remaining:
+        nearest_deadline = min(future_info[f][1] for f in remaining)
+        done, _ = wait(remaining, timeout=max(0.0, nearest_deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+        now = time.monotonic()
+        for future in remaining:
+            tool_name, deadline, call_key = future_info[future]
+            if future in done:
+                ok, output = future.result()
+                if ok:
+                    _store_tool_result(call_key, output)
+            elif deadline <= now:
+                future.cancel()  # 아직 시작 전이면 취소 (실행 중이면 이 호출 전용 스레드에서 끝까지 돌고 버려짐)
+                ok, output = False, f"오류: 도구 '{tool_name}' 실행 시간이 초과되었습니다. 잠시 후 다시 시도해주세요."
+            else:
+                continue
+            if ok:
+                state_key = TOOL_STATE_UPDATES.get(tool_name)
+                if state_key:
+                    state_updates[state_key] = output
+            results[future] = output
+        remaining.difference_update(results)
+
+    if executor is not None:
+        # 시간 초과로 버려진 도구를 기다리지 않습니다. 대기 중인 작업은 취소합니다.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    # ToolMessage는 원래 tool_call 순서(= tool_call_id 순서)를 유지합니다.
+    for tool_call, future in zip(last_message.tool_calls, call_futures):
+        tool_messages.append(ToolMessage(content=str(results[future]), tool_call_id=tool_call["id"]))
         
-    return {"messages": tool_messages, "current_weather": weather_update}
-
-# --- 6. 그래프 빌더 함수 (명시적 버전) ---
+    return {"messages": tool_messages, **state_updates}
+
+# --- 6. 그래프 빌더 함수 ---
+# 도구를 호출할 수 있는 전문가 노드 (expert_router로 도구 호출/PDF/종료를 결정)
+EXPERT_NODES = {
+    "SupervisorAgent": SupervisorAgent,
+    "InfoCollectorAgent": InfoCollectorAgent,
+    "WeatherAgent": WeatherAgent,
+    "AttractionAgent": AttractionAgent,
+    "RestaurantAgent": RestaurantAgent,
+}
+# 응답 후 항상 종료하는 노드 (사용자 입력 대기)
+TERMINAL_NODES = {
+    "DayTransitionAgent": DayTransitionAgent,
+    "ConfirmationAgent": ConfirmationAgent,
+    "PDFCreationAgent": PDFCreationAgent,
+}
+# 전문가 노드들의 다음 경로 설정 (도구 호출 / PDF / 종료)
+def expert_router(state: AgentState):
+    """agent_node가 응답 직후 기록한 next_node를 그대로 따릅니다."""
+    next_node = state.get("next_node", "end_node")
+    if next_node == "call_tools":
+        print(f"Router -> call_tools (도구: {[tc['name'] for tc in state['messages'][-1].tool_calls]})")
+    else:
+        print(f"Router -> {next_node}")
+    return next_node
+
+# 노드는 상태를 갖지 않으므로 컴파일된 그래프 하나를 모든 세션이 공유합니다.
+@lru_cache(maxsize=1)
 def build_graph():
     workflow = StateGraph(AgentState)
 
-    # 모든 노드를 명시적으로 추가
-    workflow.add_node("SupervisorAgent", SupervisorAgent)
-    workflow.add_node("InfoCollectorAgent", InfoCollectorAgent)
-    workflow.add_node("WeatherAgent", WeatherAgent)
-    workflow.add_node("AttractionAgent", AttractionAgent)
-    workflow.add_node("RestaurantAgent", RestaurantAgent)
-    workflow.add_node("DayTransitionAgent", DayTransitionAgent)
-    workflow.add_node("ConfirmationAgent", ConfirmationAgent)
-    workflow.add_node("PDFCreationAgent", PDFCreationAgent) # [추가] 새 노드 추가
+    for name, node in {**EXPERT_NODES, **TERMINAL_NODES}.items():
+        workflow.add_node(name, node)
     workflow.add_node("call_tools", call_tools)
 
-    # 진입점 설정
-    entry_points = {
-        "InfoCollectorAgent": "InfoCollectorAgent",
-        "WeatherAgent": "WeatherAgent",
-        "AttractionAgent": "AttractionAgent",
-        "RestaurantAgent": "RestaurantAgent",
-        "SupervisorAgent": "SupervisorAgent",
-        "DayTransitionAgent": "DayTransitionAgent",
-        "ConfirmationAgent": "ConfirmationAgent",
-        "PDFCreationAgent": "PDFCreationAgent", # [추가] 새 진입점 추가
-        "end_node": END
-    }
+    # 진입점 설정 (supervisor_router가 반환하는 노드 이름 -> 노드)
+    entry_points = {name: name for name in (*EXPERT_NODES, *TERMINAL_NODES)}
+    entry_points["end_node"] = END
     workflow.set_conditional_entry_point(supervisor_router, entry_points)
-    
-    # 전문가 노드들의 다음 경로 설정 (도구 호출 또는 종료)
-    def expert_router(state: AgentState):
-        last_message = state['messages'][-1]
-        
-        # 메시지가 AIMessage일 때만 처리합니다.
-        if isinstance(last_message, AIMessage):
-            # 1순위: Supervisor가 PDF용 JSON을 생성했는지 확인 (Content를 표준화하여 검사)
-            # normalize_content_to_str을 사용하여 LLM 출력의 모든 변형을 처리합니다.
-            normalized_content = normalize_content_to_str(last_message.content) 
-            
-            if "[FINAL_ITINERARY_JSON]" in normalized_content:
-                print("Router -> PDFCreationAgent (JSON 데이터 확인 성공)")
-                return "PDFCreationAgent"
-                
-            # 2순위: 도구 호출이 있는지 확인
-            if last_message.tool_calls:
-                print(f"Router -> call_tools (도구: {[tc['name'] for tc in last_message.tool_calls]})")
-                return "call_tools"
-                
-        # 3순위: 위 조건에 해당하지 않으면 종료 (라우터 멈춤 방지)
-        print("Router -> END")
-        return END
 
-    # [변경점] 모든 전문가 노드를 수정된 expert_router에 연결합니다.
-    workflow.add_conditional_edges("InfoCollectorAgent", expert_router, {"call_tools": "call_tools", END: END, "PDFCreationAgent": "PDFCreationAgent"})
-    workflow.add_conditional_edges("WeatherAgent", expert_router, {"call_tools": "call_tools", END: END, "PDFCreationAgent": "PDFCreationAgent"})
-    workflow.add_conditional_edges("AttractionAgent", expert_router, {"call_tools": "call_tools", END: END, "PDFCreationAgent": "PDFCreationAgent"})
-    workflow.add_conditional_edges("RestaurantAgent", expert_router, {"call_tools": "call_tools", END: END, "PDFCreationAgent": "PDFCreationAgent"})
-    workflow.add_conditional_edges("SupervisorAgent", expert_router, {"call_tools": "call_tools", END: END, "PDFCreationAgent": "PDFCreationAgent"})
+    # 모든 전문가 노드를 같은 expert_router에 연결합니다.
+    expert_routes = {"call_tools": "call_tools", "PDFCreationAgent": "PDFCreationAgent", "end_node": END}
+    for name in EXPERT_NODES:
+        workflow.add_conditional_edges(name, expert_router, expert_routes)
 
     # 전환/확인/PDF 노드는 항상 종료 (사용자 입력 대기)
-    workflow.add_edge("DayTransitionAgent", END)
-    workflow.add_edge("ConfirmationAgent", END)
-    workflow.add_edge("PDFCreationAgent", END) # [추가] 새 노드의 엣지 추가
+    for name in TERMINAL_NODES:
+        workflow.add_edge(name, END)
 
     # 도구 실행 후에는 항상 SupervisorRouter로 돌아가 다음 작업 결정
     workflow.add_conditional_edges("call_tools", supervisor_router, entry_points)
@@ -6,46 +6,51 @@ import emoji
 import streamlit as st
 import os
 from langchain_core.documents import Document
-from langchain_huggingface import HuggingFaceEmbeddings # 👈 [수정] 최신 권장 사항
 from langchain_community.vectorstores import FAISS
-from src.config import review_faiss # config.py에서 경로만 가져옴
+from src.config import review_faiss, get_embeddings # 경로와 공유 임베딩 모델
 
 # --- 1. data_process.ipynb에서 가져온 전처리 함수 ---
 
+_WHITESPACE_RE = re.compile(r'\s+')
+_NON_TEXT_RE = re.compile(r'[^가-힣a-zA-Z0-9\s]')
+
 def clean_review(text):
     """리뷰 텍스트를 정제합니다."""
     text = str(text) # NaN 방지
-    text = re.sub(r'\s+', ' ', text)
+    text = _WHITESPACE_RE.sub(' ', text)
     text = emoji.replace_emoji(text, replace='')
-    text = re.sub(r'[^가-힣a-zA-Z0-9\s]', '', text)
+    text = _NON_TEXT_RE.sub('', text)
     text = text.strip()
     return text
 
+def clean_review_series(reviews):
+    """clean_review와 같은 정제를 리뷰 컬럼 전체(pd.Series)에 한 번에 적용합니다."""
+    return (
+        reviews.astype(str) # NaN 방지
+        .str.replace(_WHITESPACE_RE, ' ', regex=True)
+        .map(lambda text: emoji.replace_emoji(text, replace=''))
+        .str.replace(_NON_TEXT_RE, '', regex=True)
+        .str.strip()
+    )
+
 def chunk_text_with_overlap(text, chunk_size=500, overlap=50):
     """텍스트를 청킹합니다."""
     text = text.strip()
     if len(text) <= chunk_size:
         return [text]
     
-    chunks = []
-    start = 0
-    while start < len(text):
-        end = start + chunk_size
-        chunks.append(text[start:end])
-        start = end - overlap
-        if start < 0:
-            start = 0
-        if start >= len(text):
-            break
-    return chunks
+    # 각 청크의 시작 위치는 (chunk_size - overlap) 간격이므로 range로 바로 계산합니다.
+    step = max(chunk_size - overlap, 1)
+    return [text[start:start + chunk_size] for start in range(0, len(text), step)]
 
 # --- 2. embedding.ipynb에서 가져온 문서화 함수 ---
 
 def create_documents_from_df(df):
     """DataFrame을 LangChain Document 리스트로 변환합니다."""
     docs = []
-    for _, row in df.iterrows():
-        cleaned_review = clean_review(row["리뷰"])
+    # 행마다 clean_review를 부르지 않고 리뷰 컬럼 전체를 한 번에 정제합니다.
+    cleaned_reviews = clean_review_series(df["리뷰"])
+    for (_, row), cleaned_review in zip(df.iterrows(), cleaned_reviews):
         
         chunks = chunk_text_with_overlap(cleaned_review, chunk_size=500, overlap=20)
         
@@ -104,11 +109,8 @@ def update_vector_db_if_needed(new_reviews_file="new_reviews.csv"):
             
         print(f"[RAG Updater] {len(new_docs)}개의 새 문서를 생성했습니다.")
 
-        # 2. 임베딩 모델 로드 (embedding.ipynb 참고)
-        embeddings = HuggingFaceEmbeddings(
-            model_name="upskyy/bge-m3-korean",
-            model_kwargs={"device": "cpu"}
-        )
+        # 2. 임베딩 모델 (검색과 같은 인스턴스를 재사용, 최초 1회만 로드)
+        embeddings = get_embeddings()
         
         # 3. 기존 FAISS DB 로드
         db = FAISS.load_local(
@@ -1,6 +1,7 @@
 # src/region_cut_fuzz.py
 
 import re
+import difflib
 from typing import List, Set, Dict
 
 # --- 1. 행정구역 구조 정의 (시/도 -> 시/군/구) ---
@@ -46,6 +47,35 @@ SIMPLE_ALIASES = {
     "제주": "제주특별자치도", "제주도": "제주특별자치도", "제주특별자치": "제주특별자치도"
 }
 
+# --- 3. 질의문 속 지역명 탐지 ---
+# 별칭/공식 명칭 -> 공식 명칭. 모든 이름을 하나의 정규식(긴 이름 우선)으로 묶어
+# 질의문을 한 번만 훑어 지역을 찾습니다. (이름마다 `in` 검사를 반복하지 않음)
+_REGION_NAME_TO_CANON: Dict[str, str] = {**SIMPLE_ALIASES, **{canon: canon for canon in REGION_STRUCTURE}}
+_REGION_NAMES = tuple(_REGION_NAME_TO_CANON)  # 유사도 비교 후보 (매 호출마다 만들지 않음)
+_REGION_NAME_RE = re.compile("|".join(map(re.escape, sorted(_REGION_NAME_TO_CANON, key=len, reverse=True))))
+
+def parse_regions_from_query(query: str, fuzzy: bool = False) -> Set[str]:
+    """
+    질의문(예: '부산 맛집 추천해줘')에 등장하는 시/도를 공식 명칭 집합으로 반환합니다.
+    fuzzy=True이면 정확히 일치하는 이름이 없을 때 오타(예: '경상븍도')를 유사도로 보정합니다.
+    """
+    if not query:
+        return set()
+
+    found = {_REGION_NAME_TO_CANON[m.group(0)] for m in _REGION_NAME_RE.finditer(query)}
+    if found or not fuzzy:
+        return found
+
+    # 정확히 일치하는 이름이 없을 때만 토큰 단위 유사도 비교
+    # 지역명은 두 글자 이상이고 숫자를 포함하지 않으므로 그런 토큰은 비교하지 않습니다.
+    for token in query.split():
+        if len(token) < 2 or any(ch.isdigit() for ch in token):
+            continue
+        close = difflib.get_close_matches(token, _REGION_NAMES, n=1, cutoff=0.75)
+        if close:
+            found.add(_REGION_NAME_TO_CANON[close[0]])
+    return found
+
 def normalize_region_name(user_input: str) -> str:
     """
     사용자가 입력한 목적지(예: '서울', '부산시')를 
@@ -56,13 +86,10 @@ def normalize_region_name(user_input: str) -> str:
     
     clean = user_input.strip()
     
-    # 1. 별칭 딕셔너리에서 찾기 (빠른 변환)
-    if clean in SIMPLE_ALIASES:
-        return SIMPLE_ALIASES[clean]
-    
-    # 2. 이미 공식 명칭인 경우 (REGION_STRUCTURE 키에 존재하는지 확인)
-    if clean in REGION_STRUCTURE:
-        return clean
+    # 1~2. 별칭 또는 이미 공식 명칭인 경우: 별칭+공식 명칭을 합친 역색인에서 한 번에 조회
+    canon = _REGION_NAME_TO_CANON.get(clean)
+    if canon:
+        return canon
     
     # 3. 매핑 실패 시 원본 반환 (혹은 빈 문자열 반환 정책을 쓸 수도 있음)
     # 여기서는 검색 유연성을 위해 원본을 반환하되, tools.py에서 이를 처리함.
@@ -4,6 +4,22 @@ from typing import List, Any, Optional
 from langchain_core.retrievers import BaseRetriever
 from langchain_core.callbacks import CallbackManagerForRetrieverRun
 from langchain_core.documents import Document
+import re
+from functools import lru_cache
+
+# 시/도 공식 명칭의 접미사 (예: 서울특별시 -> 서울). 긴 접미사부터 한 번에 매칭합니다.
+_PROVINCE_SUFFIX_RE = re.compile(r"(?:특별자치시|특별자치도|특별시|광역시)$")
+
+@lru_cache(maxsize=64)
+def region_keywords(fixed_location: str) -> tuple:
+    """목적지 필터에 쓸 키워드 (공식 명칭, 약칭). 목적지는 몇 개뿐이므로 한 번 만든 결과를 재사용합니다."""
+    # 1. 공식 명칭 (예: 서울특별시)
+    keywords = [fixed_location]
+    
+    # 2. 약칭 처리 (예: 서울특별시 -> 서울)
+    if "특별" in fixed_location or "광역" in fixed_location:
+        keywords.append(_PROVINCE_SUFFIX_RE.sub("", fixed_location))
+    return tuple(keywords)
 
 class RegionPreFilteringRetriever(BaseRetriever):
     """
@@ -14,28 +30,21 @@ class RegionPreFilteringRetriever(BaseRetriever):
     vectorstore: Any 
     k: int = 3
     fixed_location: Optional[str] = None # 예: "서울특별시" (정규화된 명칭)
+    # 필터 적용 전에 FAISS에서 가져올 후보 수. 지정하지 않으면 k의 4배
+    # (LangChain 기본값 20은 k=15에서 지역 필터를 거치면 결과가 모자라기 쉬움)
+    fetch_k: Optional[int] = None
 
     def _get_relevant_documents(
         self, query: str, *, run_manager: CallbackManagerForRetrieverRun = None
     ) -> List[Document]:
         
-        query_tokens = query.split()
+        # 하위 지역 판별에 쓰는 2글자 이상 토큰 (중복 제거), 문서마다 다시 거르지 않도록 한 번만 계산
+        query_tokens = frozenset(token for token in query.split() if len(token) >= 2)
 
         # [필터링 키워드 설정]
-        target_keywords = []
-        if self.fixed_location:
-            # 1. 공식 명칭 (예: 서울특별시)
-            target_keywords.append(self.fixed_location) 
-            
-            # 2. 약칭 처리 (예: 서울특별시 -> 서울)
-            if "특별" in self.fixed_location or "광역" in self.fixed_location:
-                short_name = self.fixed_location.replace("특별시", "").replace("광역시", "").replace("특별자치시", "").replace("특별자치도", "")
-                target_keywords.append(short_name)
+        target_keywords = region_keywords(self.fixed_location) if self.fixed_location else ()
 
-        def filter_func(metadata: dict) -> bool:
-            # [핵심 수정] 한글 키 '지역'을 우선적으로 확인
-            meta_region = str(metadata.get("지역") or metadata.get("region") or "")
-            
+        def is_allowed_region(meta_region: str) -> bool:
             # 1. 목적지(광역시/도) 강제 필터링
             if self.fixed_location:
                 is_region_match = False
@@ -48,25 +57,32 @@ class RegionPreFilteringRetriever(BaseRetriever):
                     return False # 지역 불일치 시 탈락
 
             # 2. 쿼리 키워드 매칭 (하위 지역 필터링)
-            token_match = False
-            has_sub_region_in_query = False
-            
-            for token in query_tokens:
-                if len(token) >= 2 and token in meta_region:
-                    token_match = True
-                    has_sub_region_in_query = True
-                    break
+            token_match = any(token in meta_region for token in query_tokens)
+            has_sub_region_in_query = token_match
             
             if has_sub_region_in_query:
                 return token_match
             else:
                 return True 
 
+        # 판정은 문서의 지역 문자열에만 의존하고, 후보 문서들은 소수의 지역 값을 공유하므로
+        # 이번 검색 안에서 지역 문자열별로 한 번만 판정하고 결과를 재사용합니다.
+        region_decisions = {}
+
+        def filter_func(metadata: dict) -> bool:
+            # [핵심 수정] 한글 키 '지역'을 우선적으로 확인
+            meta_region = str(metadata.get("지역") or metadata.get("region") or "")
+            decision = region_decisions.get(meta_region)
+            if decision is None:
+                decision = region_decisions[meta_region] = is_allowed_region(meta_region)
+            return decision
+
         # 필터 적용 검색 실행
         docs = self.vectorstore.similarity_search(
             query, 
             k=self.k, 
-            filter=filter_func 
+            filter=filter_func,
+            fetch_k=self.fetch_k or self.k * 4
         )
         
         return docs
\ No newline at end of file
@@ -1,7 +1,8 @@
 # src/time_planner.py (전체 코드)
 
 from typing import List, Dict, Any
-import json # 파이썬 기본 json 모듈
+from functools import lru_cache
+import orjson # 일정 JSON 직렬화/파싱 (표준 json보다 빠르고 한글을 그대로 UTF-8로 출력)
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import RunnablePassthrough, RunnableLambda
 from langchain_core.output_parsers import JsonOutputParser
@@ -45,31 +46,32 @@ TIMELINE_SYSTEM_PROMPT = """당신은 '여행 일정 시간 계산 전문가'입
 
 # --- 3. 시간 플래너 체인 구축 ---
 
+# JSON 파싱 핸들러와 프롬프트는 요청마다 달라지지 않으므로 임포트 시 한 번만 만듭니다.
+TIME_PLANNER_PARSER = JsonOutputParser(pydantic_object=TimedItinerary)
+
+TIME_PLANNER_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", TIMELINE_SYSTEM_PROMPT.format(schema=TIME_PLANNER_PARSER.get_format_instructions())),
+    ("human", "아래 여행 일정에 대해 시간 계획을 할당하세요:\n{itinerary_json_str}")
+])
+
+# JSON 문자열을 입력으로 받는 RunnableLambda
+def itinerary_to_json_str(state: Dict[str, Any]) -> str:
+    """state의 itinerary 리스트를 JSON 문자열로 변환합니다."""
+    # 람다 함수에서 itinerary 키를 직접 받지 않고 state 딕셔너리를 받도록 조정
+    return orjson.dumps(state['itinerary'], option=orjson.OPT_INDENT_2).decode()
+
+# 체인은 상태가 없으므로 한 번만 만들고 모든 호출에서 재사용합니다.
+@lru_cache(maxsize=1)
 def create_time_planner_chain():
     """시간 계산 및 할당을 위한 LLM 체인을 구축합니다."""
     
-    # JSON 파싱 핸들러
-    parser = JsonOutputParser(pydantic_object=TimedItinerary)
-
-    # 프롬프트 생성
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", TIMELINE_SYSTEM_PROMPT.format(schema=parser.get_format_instructions())),
-        ("human", "아래 여행 일정에 대해 시간 계획을 할당하세요:\n{itinerary_json_str}")
-    ])
-    
-    # JSON 문자열을 입력으로 받는 RunnableLambda
-    def itinerary_to_json_str(state: Dict[str, Any]) -> str:
-        """state의 itinerary 리스트를 JSON 문자열로 변환합니다."""
-        # 람다 함수에서 itinerary 키를 직접 받지 않고 state 딕셔너리를 받도록 조정
-        return json.dumps(state['itinerary'], ensure_ascii=False, indent=2)
-
     # 체인 정의: JSON 문자열로 변환 -> LLM 호출 -> JSON 파싱
     time_planner_chain = (
         RunnableLambda(itinerary_to_json_str)
         .with_config(run_name="Itinerary_Serializer")
-        | prompt
-        | LLM.with_structured_output(parser.pydantic_object) # 구조화된 JSON 출력 강제
-        | parser
+        | TIME_PLANNER_PROMPT
+        | LLM.with_structured_output(TIME_PLANNER_PARSER.pydantic_object) # 구조화된 JSON 출력 강제
+        | TIME_PLANNER_PARSER
     )
     
     # 이 체인은 { 'itinerary': List[Dict] }를 입력으로 받고 { 'timed_itinerary': List[TimedItineraryItem] }을 출력합니다.
@@ -87,13 +89,23 @@ def plan_itinerary_timeline(itinerary_json_str: str) -> str:
     
     try:
         # JSON 문자열을 파이썬 리스트 객체로 변환
-        itinerary = json.loads(itinerary_json_str)
-    except json.JSONDecodeError:
-        print("ERROR: 입력된 itinerary JSON 문자열 파싱 실패.")
+        itinerary = orjson.loads(itinerary_json_str)
+    except (orjson.JSONDecodeError, TypeError) as e:
+        print(f"ERROR: 입력된 itinerary JSON 문자열 파싱 실패. ({e})")
         return "오류: 여행 일정 JSON 데이터를 읽을 수 없습니다."
 
     # 날짜와 시간에 따라 정렬하여 순서대로 계획해야 합니다.
-    sorted_itinerary = sorted(itinerary, key=lambda x: x['day'])
+    # day 값은 몇 개뿐이므로 일차별로 한 번에 묶은 뒤 일차 순서대로 이어 붙입니다.
+    # (같은 일차 안에서는 원본 순서 유지 = day 기준 안정 정렬과 동일)
+    try:
+        items_by_day = {}
+        for item in itinerary:
+            items_by_day.setdefault(item['day'], []).append(item)
+        sorted_itinerary = [item for day in sorted(items_by_day) for item in items_by_day[day]]
+    except (KeyError, TypeError) as e:
+        # 'day'가 없거나 항목이 dict가 아닌 경우: LLM이 형식을 고쳐 다시 호출할 수 있도록 안내
+        print(f"ERROR: itinerary 항목 형식 오류: {e!r}")
+        return "오류: 여행 일정의 각 항목에는 'day' 값이 있어야 합니다."
     
     chain = create_time_planner_chain()
     
@@ -102,7 +114,7 @@ def plan_itinerary_timeline(itinerary_json_str: str) -> str:
         result = chain.invoke({"itinerary": sorted_itinerary})
         
         # LLM의 JSON 객체 응답을 다시 문자열로 변환하여 에이전트에게 전달
-        final_json_str = json.dumps(result, ensure_ascii=False, indent=2)
+        final_json_str = orjson.dumps(result, option=orjson.OPT_INDENT_2).decode()
         
         print(f"DEBUG: 생성된 시간 계획 JSON:\n{final_json_str}")
         return final_json_str
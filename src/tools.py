@@ -1,9 +1,14 @@
 # src/tools.py (전체 코드)
 
-import os, json
+import os
 import requests  # API 호출용
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import datetime
 import re 
+import time
+import threading
+from collections import OrderedDict
 from typing import List, Any 
 
 from langchain_core.tools import tool
@@ -11,45 +16,38 @@ from langchain_core.runnables import RunnablePassthrough
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.load import dumps, loads
+from streamlit.runtime.scriptrunner import add_script_run_ctx
 from src.config import LLM, load_faiss_index, GMAPS_CLIENT
 from src.region_cut_fuzz import normalize_region_name # 👈 [핵심] 정규화 함수 임포트
-from itertools import permutations
 from src.search import RegionPreFilteringRetriever  
 from src.time_planner import TimedItinerary 
 from src.time_planner import plan_itinerary_timeline as plan_timeline_impl
+from src.geocache import get_cached_coords, store_coords # 좌표 영구 캐시
 
 # --- 헬퍼 함수 (변경 없음) ---
 
-def normalize_message_to_str(message: Any) -> str:
-    """LLM / LangChain 메시지나 content를 항상 str로 변환."""
-    if message is None:
-        return ""
-    if hasattr(message, "content"):
-        return normalize_message_to_str(message.content)
-    if isinstance(message, str):
-        return message
-    if isinstance(message, list):
-        parts = []
-        for part in message:
-            if isinstance(part, dict):
-                if part.get("type") == "text" and "text" in part:
-                    parts.append(str(part["text"]))
-                else:
-                    parts.append(str(part))
-            else:
-                parts.append(str(part))
-        return "\n".join(parts)
-    if isinstance(message, dict):
-        try:
-            return json.dumps(message, ensure_ascii=False)
-        except TypeError:
-            return str(message)
-    return str(message)
-
 def format_docs(docs):
     """검색된 Document 객체를 LLM 프롬프트용 문자열로 변환합니다."""
     return "\n\n".join(doc.page_content for doc in docs)
 
+# RRF(Reciprocal Rank Fusion) 상수와 LLM에게 넘길 최종 후보 수 (기존 쿼리 5개 x Top-3과 같은 규모)
+RRF_K = 60
+RRF_TOP_N = 15
+
+def reciprocal_rank_fusion(results: List[List[Any]], k: int = RRF_K, top_n: int = RRF_TOP_N) -> List[Any]:
+    """쿼리별 검색 결과 리스트들을 RRF 점수(sum 1/(k + 순위))로 합쳐 상위 top_n개 문서를 반환합니다. (본문 기준 중복 제거)"""
+    fused_scores = {}
+    docs_by_content = {}
+    for docs in results:
+        for rank, doc in enumerate(docs, start=1):
+            content = doc.page_content
+            docs_by_content.setdefault(content, doc)
+            fused_scores[content] = fused_scores.get(content, 0.0) + 1.0 / (k + rank)
+
+    # 점수가 같으면 먼저 나온 문서가 앞에 옵니다. (sorted는 안정 정렬)
+    ranked_contents = sorted(fused_scores, key=fused_scores.get, reverse=True)[:top_n]
+    return [docs_by_content[content] for content in ranked_contents]
+
 # --- RAG 체인 구성 (쿼리 생성 부분은 유지) ---
 
 # 2. RAG-Fusion용 쿼리 생성 프롬프트
@@ -62,17 +60,13 @@ prompt_perspectives = ChatPromptTemplate.from_template(template)
 
 
 # 3. LLM의 쿼리 생성 결과를 정제하는 헬퍼 함수
+_QUERY_NUMBER_PREFIX_RE = re.compile(r"^\d+[:.]\s*")
+_QUERY_SKIP_PREFIXES = ("다음은", "원본 질문")
+
 def clean_generated_queries(text: str) -> List[str]:
     """LLM이 생성한 쿼리 문자열에서 실제 쿼리만 정리하여 리스트로 반환합니다."""
-    queries = []
-    for line in text.split("\n"):
-        cleaned_line = re.sub(r"^\d+[:.]\s*", "", line).strip()
-        if not cleaned_line:
-            continue
-        if cleaned_line.startswith("다음은") or cleaned_line.startswith("원본 질문"):
-            continue
-        queries.append(cleaned_line)
-    return queries
+    cleaned_lines = (_QUERY_NUMBER_PREFIX_RE.sub("", line).strip() for line in text.split("\n"))
+    return [line for line in cleaned_lines if line and not line.startswith(_QUERY_SKIP_PREFIXES)]
 
 # 4. 쿼리 생성 체인
 generate_queries = (
@@ -118,13 +112,38 @@ final_generation_chain = (
     | StrOutputParser()
 )
 
+# 지역별 검색 체인 캐시: 리트리버는 호출 간 상태가 없으므로 (DB, 목적지)가 같으면 재사용합니다.
+# 벡터DB 업데이트로 load_faiss_index 캐시가 초기화되어 DB 객체가 바뀌면 새로 만듭니다.
+RETRIEVAL_CHAIN_CACHE_SIZE = 64
+_RETRIEVAL_CHAINS = OrderedDict()  # 목적지 -> (DB, retriever.map() 체인)
+_RETRIEVAL_CHAINS_LOCK = threading.Lock()
+
+def _get_retrieval_chain(db, target_city: str):
+    """목적지 필터가 적용된 RegionPreFilteringRetriever의 병렬 검색 체인을 반환합니다."""
+    with _RETRIEVAL_CHAINS_LOCK:
+        cached = _RETRIEVAL_CHAINS.get(target_city)
+        if cached is not None and cached[0] is db:
+            _RETRIEVAL_CHAINS.move_to_end(target_city)
+            return cached[1]
+
+        retriever = RegionPreFilteringRetriever(
+            vectorstore=db, 
+            k=15,  # 👈 [수정] k=15로 늘려 충분한 데이터를 제공
+            fixed_location=target_city # 👈 정규화된 지역명 전달 (대구 차단)
+        )
+        retrieval_chain = retriever.map()
+        _RETRIEVAL_CHAINS[target_city] = (db, retrieval_chain)
+        while len(_RETRIEVAL_CHAINS) > RETRIEVAL_CHAIN_CACHE_SIZE:
+            _RETRIEVAL_CHAINS.popitem(last=False)
+        return retrieval_chain
+
 # --- 4. 에이전트가 사용할 '도구(Tools)' 정의 ---
 
 @tool
 # 👈 [핵심 수정 1] destination 인자 추가 (Streamlit 종속성 제거)
 def search_attractions_and_reviews(query: str, destination: str) -> str:
     """
-    사용자 쿼리를 5개로 확장하고, '각 쿼리별 Top-3' 결과를 결합하여 후보 목록을 검색합니다. 
+    사용자 쿼리를 5개로 확장하고, 쿼리별 검색 결과를 RRF로 결합하여 후보 목록을 검색합니다. 
     (지역 필터링 적용)
     """
     print(f"\n--- [DEBUG RAG] RAG 검색 시작 ---") 
@@ -144,14 +163,10 @@ def search_attractions_and_reviews(query: str, destination: str) -> str:
 
     try:
         DB = load_faiss_index() # 캐시된 DB 로드
-        FAISS_RETRIEVER = RegionPreFilteringRetriever(
-            vectorstore=DB, 
-            k=15,  # 👈 [수정] k=15로 늘려 충분한 데이터를 제공
-            fixed_location=target_city # 👈 정규화된 지역명 전달 (대구 차단)
-        )        
-        retrieval_only_chain = FAISS_RETRIEVER.map() 
+        retrieval_only_chain = _get_retrieval_chain(DB, target_city)
     except Exception as e:
         print(f"!!!!!!!!!! [DEBUG] FAISS 인덱스 로드 실패 !!!!!!!!!!")
+        print(f"DEBUG: Error details: {e}")
         return "오류: RAG 벡터 데이터베이스를 로드하는 데 실패했습니다."
     
     # 1. 5개 쿼리 생성 및 정제
@@ -160,15 +175,8 @@ def search_attractions_and_reviews(query: str, destination: str) -> str:
     # 2. RAG 병렬 검색
     parallel_search_results = retrieval_only_chain.invoke(generated_queries)
     
-    # 3. Top-3 결과 결합 (중복 제거) 👈 [수정] 쿼리당 Top-3을 뽑아옴
-    top_1_docs = []
-    seen_content = set()
-    for doc_list in parallel_search_results:
-        # 각 쿼리 결과 리스트에서 Top-3을 뽑아 LLM에게 전달 (추천 다양화)
-        for doc in doc_list[:3]: 
-            if doc.page_content not in seen_content:
-                top_1_docs.append(doc)
-                seen_content.add(doc.page_content)
+    # 3. RRF로 쿼리별 결과 결합 (중복 제거) 👈 여러 쿼리에서 공통으로 상위에 오른 문서를 우선
+    top_1_docs = reciprocal_rank_fusion(parallel_search_results)
     
     # 4. LLM 요약 (최종 후보 목록 생성)
     context_str = format_docs(top_1_docs)
@@ -182,6 +190,89 @@ def search_attractions_and_reviews(query: str, destination: str) -> str:
     
     return final_result
 
+# OWM 호출은 keep-alive 세션을 재사용해 매번 TCP/TLS 연결을 새로 맺지 않습니다.
+# 일시적인 429/5xx 응답은 짧은 백오프로 2번까지 자동 재시도합니다.
+# (googlemaps.Client는 내부적으로 이미 하나의 requests.Session을 재사용함)
+OWM_SESSION = requests.Session()
+OWM_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504]),
+))
+
+# OWM Geocoding 결과를 프로세스 단위 TTL 캐시에 보관합니다. (목적지 -> (좌표 또는 None, 만료 시각))
+# 프로세스 캐시에 없으면 SQLite 영구 캐시(src/geocache.py)를 먼저 확인합니다.
+# 찾지 못한 목적지(None)도 짧게 캐시해 잘못된 도시명으로 API를 반복 호출하지 않습니다.
+# (예외가 나면 캐시되지 않으므로 일시적인 API 오류는 다음 호출에서 다시 시도됨)
+GEOCODE_CACHE_TTL_SECONDS = 24 * 60 * 60
+GEOCODE_NEGATIVE_TTL_SECONDS = 60 * 60
+GEOCODE_CACHE_SIZE = 256
+_GEOCODE_CACHE = OrderedDict()
+_GEOCODE_CACHE_LOCK = threading.Lock()
+
+def _owm_geocode(destination: str, api_key: str):
+    """OWM Geocoding으로 (위도, 경도)를 조회합니다. 결과가 없으면 None."""
+    cache_key = destination.strip()
+    now = time.time()
+    with _GEOCODE_CACHE_LOCK:
+        cached = _GEOCODE_CACHE.get(cache_key)
+        if cached is not None and cached[1] > now:
+            _GEOCODE_CACHE.move_to_end(cache_key)
+            return cached[0]
+
+    coords = get_cached_coords(cache_key) or _fetch_owm_geocode(cache_key, api_key)
+
+    ttl = GEOCODE_CACHE_TTL_SECONDS if coords else GEOCODE_NEGATIVE_TTL_SECONDS
+    with _GEOCODE_CACHE_LOCK:
+        _GEOCODE_CACHE[cache_key] = (coords, now + ttl)
+        _GEOCODE_CACHE.move_to_end(cache_key)
+        while len(_GEOCODE_CACHE) > GEOCODE_CACHE_SIZE:
+            _GEOCODE_CACHE.popitem(last=False)
+    return coords
+
+def _fetch_owm_geocode(destination: str, api_key: str):
+    geo_url = "https://api.openweathermap.org/geo/1.0/direct"
+    geo_params = {'q': f"{destination},KR", 'limit': 1, 'appid': api_key}
+    response = OWM_SESSION.get(geo_url, params=geo_params, timeout=5)
+    response.raise_for_status()
+    geo_data = response.json()
+    if geo_data:
+        lat, lon = geo_data[0]['lat'], geo_data[0]['lon']
+        store_coords(destination, lat, lon)
+        return lat, lon
+    return None
+
+# OWM 예보는 3시간 단위로 갱신되므로 같은 지점(소수점 2자리, 약 1km)의 예보 리스트를 30분간 재사용합니다.
+# 목적지 표기나 여행 기간 문자열이 달라도 좌표가 같으면 Forecast API를 다시 호출하지 않습니다.
+FORECAST_CACHE_TTL_SECONDS = 1800
+FORECAST_CACHE_SIZE = 128
+_FORECAST_CACHE = OrderedDict()  # (위도, 경도) -> (만료 시각, 예보 리스트)
+_FORECAST_CACHE_LOCK = threading.Lock()
+
+def _owm_forecast(lat: float, lon: float, api_key: str) -> list:
+    """OWM 5일/3시간 예보 리스트를 반환합니다. (빈 결과와 예외는 캐시하지 않음)"""
+    cache_key = (round(lat, 2), round(lon, 2))
+    now = time.time()
+    with _FORECAST_CACHE_LOCK:
+        cached = _FORECAST_CACHE.get(cache_key)
+        if cached is not None and cached[0] > now:
+            _FORECAST_CACHE.move_to_end(cache_key)
+            return cached[1]
+
+    forecast_url = "https://api.openweathermap.org/data/2.5/forecast"
+    forecast_params = {'lat': lat, 'lon': lon, 'appid': api_key, 'units': 'metric', 'lang': 'kr'}
+    response = OWM_SESSION.get(forecast_url, params=forecast_params, timeout=10)
+    response.raise_for_status()
+    forecasts = response.json().get('list', [])
+
+    if forecasts:
+        with _FORECAST_CACHE_LOCK:
+            _FORECAST_CACHE[cache_key] = (now + FORECAST_CACHE_TTL_SECONDS, forecasts)
+            _FORECAST_CACHE.move_to_end(cache_key)
+            while len(_FORECAST_CACHE) > FORECAST_CACHE_SIZE:
+                _FORECAST_CACHE.popitem(last=False)
+    return forecasts
+
 @tool
 # 👈 [핵심 수정 2] 날씨 문제 해결: 5일치 모두 전달
 def get_weather_forecast(destination: str, dates: str) -> str:
@@ -197,30 +288,19 @@ def get_weather_forecast(destination: str, dates: str) -> str:
     if not API_KEY:
         return "오류: OWM_API_KEY가 .env 파일에 설정되지 않았습니다."
 
-    # 1단계: Geocoding (좌표 구하기)
-    geo_url = "https://api.openweathermap.org/geo/1.0/direct"
-    geo_params = {'q': f"{destination},KR", 'limit': 1, 'appid': API_KEY}
-    lat, lon = None, None
+    # 1단계: Geocoding (좌표 구하기, 같은 도시는 캐시된 좌표 재사용)
     try:
-        response = requests.get(geo_url, params=geo_params, timeout=5)
-        response.raise_for_status()
-        geo_data = response.json()
-        if geo_data:
-            lat, lon = geo_data[0]['lat'], geo_data[0]['lon']
-        else:
-            return f"오류: '{destination}'의 좌표(Geocoding)를 찾을 수 없습니다."
+        coords = _owm_geocode(destination.strip(), API_KEY)
     except Exception as e:
         return f"오류: Geocoding API 호출 중 문제 발생: {e}"
+    if not coords:
+        return f"오류: '{destination}'의 좌표(Geocoding)를 찾을 수 없습니다."
+    lat, lon = coords
 
-    # 2단계: Forecast (5일 예보 데이터 가져오기)
-    forecast_url = "https://api.openweathermap.org/data/2.5/forecast"
-    forecast_params = {'lat': lat, 'lon': lon, 'appid': API_KEY, 'units': 'metric', 'lang': 'kr'}
+    # 2단계: Forecast (5일 예보 데이터 가져오기, 같은 지점은 30분간 캐시된 예보 재사용)
     forecasts = None
     try:
-        response = requests.get(forecast_url, params=forecast_params, timeout=10)
-        response.raise_for_status()
-        forecast_data = response.json()
-        forecasts = forecast_data.get('list', [])
+        forecasts = _owm_forecast(lat, lon, API_KEY)
     except Exception as e:
         return f"오류: Forecast API 호출 중 문제 발생: {e}"
     if not forecasts:
@@ -232,8 +312,7 @@ def get_weather_forecast(destination: str, dates: str) -> str:
 
     for item in forecasts:
         dt_txt = item['dt_txt']
-        date_part = dt_txt.split(" ")[0]
-        time_part = dt_txt.split(" ")[1]
+        date_part, time_part = dt_txt.split(" ", 1)
         
         # 날짜별 대표 예보만 수집 (정오 기준 또는 최초 데이터)
         if "12:00:00" in time_part or date_part not in seen_dates:
@@ -250,7 +329,31 @@ def get_weather_forecast(destination: str, dates: str) -> str:
     return f"[{destination} 5일치 날씨 예보 데이터]\n{result_text}\n\n[사용자 요청 기간: {dates}]\n(위 데이터 중 여행 기간에 해당하는 날짜만 골라서 답변하세요.)"
     
 # --- (나머지 도구 함수는 그대로 유지) ---
+# 상세 경로 캐시: 같은 구간은 15분 단위 출발 시간대 안에서 대중교통 결과가 거의 같으므로
+# 일정 재생성/재계산 시 Directions API를 다시 호출하지 않습니다. (성공한 결과만 저장)
+ROUTE_CACHE_BUCKET_SECONDS = 900
+ROUTE_CACHE_SIZE = 1024
+_ROUTE_CACHE = OrderedDict()  # (출발지, 도착지, 이동수단, 시간대) -> 경로 정보
+_ROUTE_CACHE_LOCK = threading.Lock()
+
 def get_detailed_route(start_place: str, end_place: str, mode="transit"):
+    """두 장소 사이의 상세 경로(소요 시간, 거리, 주요 이동 단계)를 조회합니다. 결과는 시간대별로 캐시됩니다."""
+    cache_key = (start_place, end_place, mode, int(time.time()) // ROUTE_CACHE_BUCKET_SECONDS)
+    with _ROUTE_CACHE_LOCK:
+        cached = _ROUTE_CACHE.get(cache_key)
+        if cached is not None:
+            _ROUTE_CACHE.move_to_end(cache_key)
+            return cached
+
+    route_info = _fetch_detailed_route(start_place, end_place, mode)
+    if route_info:
+        with _ROUTE_CACHE_LOCK:
+            _ROUTE_CACHE[cache_key] = route_info
+            while len(_ROUTE_CACHE) > ROUTE_CACHE_SIZE:
+                _ROUTE_CACHE.popitem(last=False)
+    return route_info
+
+def _fetch_detailed_route(start_place: str, end_place: str, mode="transit"):
     # (코드 내용 변경 없음. 인자만 사용)
     # ...
     # (기존 코드 유지)
@@ -300,6 +403,63 @@ def get_detailed_route(start_place: str, end_place: str, mode="transit"):
         print(f"ERROR: 상세 경로 조회 중 오류 발생: {e}")
         return None
 
+# 경로가 없는 구간의 소요 시간(초). 행렬을 정수로만 유지해 DP에서 int/float 혼합 연산을 피합니다.
+# (실제 이동 시간의 합은 이 값에 한참 못 미치므로, 이 값 이상이면 '도달 불가'로 봅니다)
+UNREACHABLE_DURATION = 10 ** 9
+
+def _parse_duration_matrix(matrix_result, places):
+    """Distance Matrix 응답을 초 단위 소요 시간 행렬(list of lists)로 변환합니다. 경로가 없는 구간은 UNREACHABLE_DURATION입니다."""
+    duration_matrix = []
+    for i, row in enumerate(matrix_result['rows']):
+        elements = row['elements']
+        duration_row = [el['duration']['value'] if el['status'] == 'OK' else UNREACHABLE_DURATION for el in elements]
+        if UNREACHABLE_DURATION in duration_row:
+            for j, el in enumerate(elements):
+                if el['status'] != 'OK':
+                    print(f"DEBUG: [ {places[i]} -> {places[j]} ] 구간 경로 없음 (Status: {el['status']})")
+        duration_matrix.append(duration_row)
+    return duration_matrix
+
+def _shortest_route_order(duration_matrix):
+    """0번 장소에서 출발해 모든 장소를 한 번씩 방문하는 최소 이동 시간 순서를 Held-Karp DP로 구합니다.
+
+    순열 전수 탐색(O(n!)) 대신 O(n^2 * 2^n)으로 계산하며, 유효한 경로가 없으면 (inf, [])를 반환합니다.
+    """
+    n = len(duration_matrix)
+    full_mask = (1 << n) - 1
+    # dp[mask][last]: 0번에서 출발해 mask의 장소를 모두 방문하고 last에서 끝나는 최소 이동 시간
+    dp = [[UNREACHABLE_DURATION] * n for _ in range(1 << n)]
+    parent = [[-1] * n for _ in range(1 << n)]
+    dp[1][0] = 0
+
+    for mask in range(1, 1 << n, 2):  # 출발지(0번)를 포함하는 mask만 확인
+        row = dp[mask]
+        for last in range(n):
+            cost = row[last]
+            if cost >= UNREACHABLE_DURATION:
+                continue
+            durations = duration_matrix[last]
+            for nxt in range(1, n):
+                bit = 1 << nxt
+                if mask & bit:
+                    continue
+                new_cost = cost + durations[nxt]
+                if new_cost < dp[mask | bit][nxt]:
+                    dp[mask | bit][nxt] = new_cost
+                    parent[mask | bit][nxt] = last
+
+    last = min(range(n), key=lambda j: dp[full_mask][j])
+    min_duration = dp[full_mask][last]
+    if min_duration >= UNREACHABLE_DURATION:
+        return float('inf'), []
+
+    order = []
+    mask = full_mask
+    while last != -1:
+        order.append(last)
+        mask, last = mask ^ (1 << last), parent[mask][last]
+    return min_duration, order[::-1]
+
 @tool
 def optimize_and_get_routes(places: List[str]) -> str:
     """
@@ -333,35 +493,11 @@ def optimize_and_get_routes(places: List[str]) -> str:
     # --- 2단계: 경로 최적화 (단순화된 TSP) ---
     try:
         print("DEBUG: Distance Matrix 결과 파싱 및 최적화 시작...")
-        duration_matrix = []
-        
-        for i, row in enumerate(matrix_result['rows']):
-            duration_row = []
-            for j, el in enumerate(row['elements']):
-                if el['status'] == 'OK':
-                    duration_val = el['duration']['value']
-                    duration_row.append(duration_val)
-                else:
-                    print(f"DEBUG: [ {places[i]} -> {places[j]} ] 구간 경로 없음 (Status: {el['status']})")
-                    duration_row.append(float('inf')) 
-            duration_matrix.append(duration_row)
+        duration_matrix = _parse_duration_matrix(matrix_result, places)
         
         print(f"DEBUG: 완성된 Duration Matrix (초): {duration_matrix}")
 
-        min_duration = float('inf')
-        best_order_indices = []
-        other_indices = list(range(1, len(places))) 
-        
-        for p in permutations(other_indices):
-            current_order_indices = [0] + list(p) 
-            current_duration = 0
-            for i in range(len(current_order_indices) - 1):
-                origin_idx = current_order_indices[i]
-                dest_idx = current_order_indices[i+1]
-                current_duration += duration_matrix[origin_idx][dest_idx]
-            if current_duration < min_duration:
-                min_duration = current_duration
-                best_order_indices = current_order_indices
+        min_duration, best_order_indices = _shortest_route_order(duration_matrix)
 
         if min_duration == float('inf'):
             print("DEBUG: 최적화 실패 (모든 경로에 유효한 값이 없어 'inf'만 존재)")
@@ -402,4 +538,18 @@ def plan_itinerary_timeline(itinerary_json_str: str) -> str:
 
 # 에이전트가 사용할 도구 목록
 TOOLS = [search_attractions_and_reviews, get_weather_forecast, optimize_and_get_routes, plan_itinerary_timeline]
-AVAILABLE_TOOLS = {tool.name: tool for tool in TOOLS}
\ No newline at end of file
+AVAILABLE_TOOLS = {tool.name: tool for tool in TOOLS}
+
+
+# --- 5. 콜드 스타트 완화: 첫 검색 전에 임베딩 모델/FAISS 인덱스를 백그라운드에서 미리 로드 ---
+def _warmup_faiss_index():
+    try:
+        load_faiss_index()  # st.cache_resource에 채워 두면 첫 검색은 메모리에서 바로 사용
+        print("DEBUG: FAISS 인덱스 예열 완료")
+    except Exception as e:
+        print(f"DEBUG: FAISS 인덱스 예열 실패 (첫 검색 시 다시 로드): {e}")
+
+# 모듈은 프로세스당 한 번만 임포트되므로 예열도 한 번만 실행됩니다.
+_WARMUP_THREAD = threading.Thread(target=_warmup_faiss_index, name="faiss-warmup", daemon=True)
+add_script_run_ctx(_WARMUP_THREAD)  # Streamlit 실행 컨텍스트를 붙여 캐시 접근 시 경고가 나지 않도록
+_WARMUP_THREAD.start()